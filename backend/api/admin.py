@@ -0,0 +1,46 @@
+from django.contrib import admin
+
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Просмотр буфера медленных запросов, только чтение."""
+    list_display = (
+        'created',
+        'duration',
+        'view',
+        'short_sql',
+        'has_plan',
+    )
+    list_filter = ('view',)
+    search_fields = ('sql', 'path')
+    readonly_fields = (
+        'created',
+        'duration',
+        'view',
+        'path',
+        'sql',
+        'params',
+        'plan',
+        'stack',
+    )
+    fields = readonly_fields
+    show_full_result_count = False
+
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    short_sql.short_description = 'SQL'
+
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+    has_plan.short_description = 'План'
+    has_plan.boolean = True
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
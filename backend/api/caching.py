@@ -0,0 +1,57 @@
+import hashlib
+
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.versions import get_version
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Кеш ответов list и retrieve для анонимных пользователей.
+
+    Для анонимного пользователя ответ зависит только от адреса
+    и параметров запроса, поэтому данные ответа кешируются по схеме
+    и хосту (в ответе абсолютные ссылки на изображения), пути,
+    нормализованным параметрам и текущим версиям данных
+    (get_version_names); изменение данных меняет ключ.
+    Хранилище — кеш 'responses' из settings.CACHES.
+    """
+    response_cache_alias = 'responses'
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        versions = [
+            get_version(name) for name in self.get_version_names(request)
+        ]
+        raw = (
+            f'{request.build_absolute_uri("/")}|{request.path}|'
+            f'{params!r}|{versions!r}'
+        )
+        return f'response:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = caches[self.response_cache_alias]
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
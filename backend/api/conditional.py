@@ -0,0 +1,66 @@
+import hashlib
+import math
+import time
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from recipes.versions import get_version, user_version_name
+
+
+class ConditionalMixin:
+    """
+    Поддержка условных запросов (ETag / Last-Modified) для list и retrieve.
+
+    Валидаторы строятся из меток версий (recipes.versions), а не из тела
+    ответа, поэтому 304 возвращается до запуска сериализатора.
+    Вьюсет задаёт имена версий методом get_version_names(request).
+    """
+    user_dependent = False
+
+    def get_conditional_validators(self, request):
+        names = list(self.get_version_names(request))
+        user = request.user
+        if self.user_dependent and user.is_authenticated:
+            names.append(user_version_name(user.pk))
+        versions = [get_version(name) for name in names]
+        key = '|'.join(f'{name}={version!r}' for name, version in zip(
+            names, versions
+        ))
+        if self.user_dependent:
+            key += f'|viewer={user.pk}'
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        # Last-Modified имеет точность в секунду. Пока секунда последнего
+        # изменения не закончилась, новое изменение в ту же секунду
+        # не изменило бы заголовок, и запрос с одним If-Modified-Since
+        # получил бы устаревший 304, поэтому в это время отдаётся
+        # только ETag.
+        last_modified = math.ceil(max(versions))
+        if last_modified > time.time():
+            last_modified = None
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            if self.user_dependent:
+                patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -14,15 +14,13 @@ class RecipeFilter(filters.FilterSet):
     )
 
     def filter(self, queryset, name, value):
-        """Метод фильтрации рецептов"""
-        if name == 'is_in_shopping_cart' and value:
-            queryset = queryset.filter(
-                shopping_list_recipe__user=self.request.user
-            )
-        if name == 'is_favorited' and value:
-            queryset = queryset.filter(
-                favorite_recipe__user=self.request.user
-            )
+        """Метод фильтрации рецептов.
+
+        Флаги is_favorited и is_in_shopping_cart аннотируются
+        в RecipesViewSet.get_queryset, поэтому фильтруем по ним напрямую.
+        """
+        if name in ('is_in_shopping_cart', 'is_favorited') and value:
+            queryset = queryset.filter(**{name: True})
         return queryset
 
     class Meta:
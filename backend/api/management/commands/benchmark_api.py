@@ -0,0 +1,208 @@
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.core.cache import caches
+from django.core.management import BaseCommand, call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (CaptureQueriesContext, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, ShoppingList
+from users.models import Follow, User
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def consume(response):
+    """Читает тело ответа целиком (в том числе потокового)."""
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеры горячих эндпоинтов API (задержка, число SQL-запросов, "
+        "пиковая память) на нескольких объёмах данных. Результат — JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="1000,10000",
+            help="Число рецептов для замеров, через запятую.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=30,
+            help="Число запросов к каждому эндпоинту.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--current-db", action="store_true",
+            help=(
+                "Замерять текущую базу как есть, без создания тестовой "
+                "базы и генерации данных."
+            ),
+        )
+        parser.add_argument("--output", help="Файл для JSON-результата.")
+        parser.add_argument(
+            "--compare", help="JSON предыдущего запуска для сравнения.",
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        if options["current_db"]:
+            results = {str(Recipe.objects.count()): self.run_endpoints()}
+        else:
+            results = self.run_sizes(
+                sorted(int(size) for size in options["sizes"].split(",")),
+                options["seed"],
+            )
+        report = {"meta": self.get_meta(options), "results": results}
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(content)
+        else:
+            self.stdout.write(content)
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def get_meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True,
+                text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "repeat": self.repeat,
+            "seed": options["seed"],
+        }
+
+    def run_sizes(self, sizes, seed):
+        """Тестовая база наполняется по возрастанию объёма,
+        после каждого шага выполняются замеры."""
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        results = {}
+        try:
+            call_command("load_tags", stdout=io.StringIO())
+            call_command("load_ingredients", stdout=io.StringIO())
+            generated = 0
+            for size in sizes:
+                call_command(
+                    "generate_data",
+                    recipes=size - generated,
+                    users=max(1, (size - generated) // 10),
+                    seed=seed + size,
+                    stdout=io.StringIO(),
+                )
+                generated = size
+                results[str(size)] = self.run_endpoints()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        return results
+
+    def get_endpoints(self):
+        recipe = Recipe.objects.order_by("-favorites_count").first()
+        ingredient = Ingredient.objects.order_by("id").first()
+        buyer = (
+            ShoppingList.objects.values("user")
+            .annotate(total=Count("id")).order_by("-total").first()
+        )
+        follower = (
+            Follow.objects.values("user")
+            .annotate(total=Count("id")).order_by("-total").first()
+        )
+        user = User.objects.get(
+            pk=(buyer or follower or {"user": User.objects.first().pk})[
+                "user"
+            ]
+        )
+        prefix = ingredient.name[:2] if ingredient else "а"
+        return {
+            "recipes_list_anon": (None, "/api/recipes/"),
+            "recipes_list": (user, "/api/recipes/"),
+            "recipes_list_limit_100": (user, "/api/recipes/?limit=100"),
+            "recipe_detail": (user, f"/api/recipes/{recipe.pk}/"),
+            "subscriptions": (
+                user, "/api/users/subscriptions/?recipes_limit=3"
+            ),
+            "ingredients_search": (None, f"/api/ingredients/?name={prefix}"),
+            "download_shopping_cart": (
+                user, "/api/recipes/download_shopping_cart/"
+            ),
+        }
+
+    def run_endpoints(self):
+        for alias in ("default", "responses"):
+            caches[alias].clear()
+        results = {}
+        for name, (user, url) in self.get_endpoints().items():
+            client = APIClient()
+            if user is not None:
+                client.force_authenticate(user)
+            results[name] = self.measure(client, url)
+            self.stderr.write(f"{name}: {results[name]}")
+        return results
+
+    def measure(self, client, url):
+        timings = []
+        queries = []
+        for _ in range(self.repeat):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.get(url)
+                consume(response)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(context.captured_queries))
+        tracemalloc.start()
+        consume(client.get(url))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p90_ms": round(percentile(timings, 0.9), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "first_ms": round(timings[0], 3),
+            "queries": max(queries),
+            "first_queries": queries[0],
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+    def compare(self, path, results):
+        with open(path, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        for size, endpoints in results.items():
+            for name, current in endpoints.items():
+                previous = baseline.get(size, {}).get(name)
+                if previous is None:
+                    continue
+                self.stderr.write(
+                    f"{size:>8} {name:<24} "
+                    f"p50 {previous['p50_ms']:>9} -> "
+                    f"{current['p50_ms']:>9} ms  "
+                    f"queries {previous['queries']:>4} -> "
+                    f"{current['queries']:>4}"
+                )
@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_labels(**labels):
+    return ','.join(
+        f'{name}="{escape(value)}"' for name, value in labels.items()
+    )
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (как в Prometheus)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            lines.append(
+                f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+            )
+        total += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {total}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Метрики запросов в памяти процесса.
+
+    При нескольких воркерах gunicorn каждый процесс отдаёт свои значения,
+    Prometheus различает их по адресу цели или метке instance.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_time = defaultdict(float)
+
+    def observe(self, route, method, status, duration, queries, db_time):
+        key = (route, method)
+        with self.lock:
+            self.requests[key + (status,)] += 1
+            self.latency[key].observe(duration)
+            self.queries[key].observe(queries)
+            self.db_time[key] += db_time
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP foodgram_http_requests_total Число запросов.',
+                '# TYPE foodgram_http_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(
+                self.requests.items()
+            ):
+                labels = format_labels(
+                    route=route, method=method, status=status
+                )
+                lines.append(f'foodgram_http_requests_total{{{labels}}} '
+                             f'{count}')
+            for name, help_text, histograms in (
+                (
+                    'foodgram_http_request_duration_seconds',
+                    'Время обработки запроса.',
+                    self.latency,
+                ),
+                (
+                    'foodgram_db_queries_per_request',
+                    'Число SQL-запросов на один HTTP-запрос.',
+                    self.queries,
+                ),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (route, method), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.render(
+                        name, format_labels(route=route, method=method)
+                    ))
+            lines.extend((
+                '# HELP foodgram_db_query_seconds_total '
+                'Суммарное время SQL-запросов.',
+                '# TYPE foodgram_db_query_seconds_total counter',
+            ))
+            for (route, method), seconds in sorted(self.db_time.items()):
+                labels = format_labels(route=route, method=method)
+                lines.append(f'foodgram_db_query_seconds_total{{{labels}}} '
+                             f'{seconds}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """Обёртка connection.execute_wrapper: считает запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def get_route(request):
+    """Имя маршрута (например, api:recipes-list): в отличие от пути
+    не содержит id, поэтому число рядов метрик ограничено."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def get_view_action(request):
+    """Класс представления и действие DRF, например
+    ('RecipesViewSet', 'list'); для обычных функций — их имя и None."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+    view = getattr(match.func, 'cls', match.func)
+    actions = getattr(match.func, 'actions', None) or {}
+    return view.__name__, actions.get(request.method.lower())
+
+
+def iter_with_wrapper(content, wrapper):
+    """
+    Тело потокового ответа с обёрткой connection.execute_wrapper.
+    Запросы таких ответов (например, выгрузки списка покупок)
+    выполняются уже после выхода из middleware, при отдаче тела.
+    Обёртка подключается на время получения каждого фрагмента,
+    поэтому не остаётся на соединении, если тело не дочитано.
+    """
+    iterator = iter(content)
+    while True:
+        with connection.execute_wrapper(wrapper):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def wrap_streaming(response, wrapper):
+    if response.streaming:
+        response.streaming_content = iter_with_wrapper(
+            response.streaming_content, wrapper
+        )
+
+
+def call_on_close(response, callback):
+    """Вызывает callback при закрытии ответа (после отдачи тела)."""
+    close = response.close
+
+    def callback_and_close():
+        try:
+            callback()
+        finally:
+            close()
+
+    response.close = callback_and_close
+
+
+class MetricsMiddleware:
+    """
+    Задержка, число и время SQL-запросов по маршрутам.
+
+    Включается настройкой METRICS_ENABLED; если она выключена,
+    Django не добавляет middleware в цепочку и затрат нет совсем.
+    Для потоковых ответов учитываются и запросы при отдаче тела,
+    а метрики записываются при закрытии ответа.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        def observe():
+            registry.observe(
+                get_route(request),
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+                timer.count,
+                timer.duration,
+            )
+
+        if response.streaming:
+            wrap_streaming(response, timer)
+            call_on_close(response, observe)
+        else:
+            observe()
+        return response
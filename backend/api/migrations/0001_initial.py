@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Время записи')),
+                ('duration', models.FloatField(verbose_name='Длительность, мс')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Параметры')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='Представление')),
+                ('path', models.TextField(blank=True, verbose_name='Адрес запроса')),
+                ('stack', models.TextField(blank=True, verbose_name='Стек вызова')),
+                ('plan', models.TextField(blank=True, verbose_name='План выполнения')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-id',),
+            },
+        ),
+    ]
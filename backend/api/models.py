@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Медленный SQL-запрос, записанный api.slow_queries."""
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Время записи',
+    )
+    duration = models.FloatField(verbose_name='Длительность, мс')
+    sql = models.TextField(verbose_name='SQL')
+    params = models.TextField(blank=True, verbose_name='Параметры')
+    view = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Представление',
+    )
+    path = models.TextField(blank=True, verbose_name='Адрес запроса')
+    stack = models.TextField(blank=True, verbose_name='Стек вызова')
+    plan = models.TextField(blank=True, verbose_name='План выполнения')
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self):
+        return f'{self.duration:.0f} мс: {self.sql[:80]}'
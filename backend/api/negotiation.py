@@ -0,0 +1,15 @@
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Всегда первый рендерер действия, без учёта Accept и ?format=.
+    Для действий, которые сами выбирают формат тела ответа:
+    ответы DRF (например, ошибки) при этом остаются в JSON.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -1,7 +1,201 @@
+import hashlib
+from collections import OrderedDict
+from functools import partial
 
-from rest_framework.pagination import PageNumberPagination
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class CountPaginator(Paginator):
+    """Paginator, получающий общее число объектов из внешней функции."""
+
+    def __init__(self, object_list, per_page, count_func, **kwargs):
+        self.count_func = count_func
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        return self.count_func(self.object_list)
+
+
+class EstimatedPage(Page):
+    """
+    Страница при неточном числе объектов: наличие следующей страницы
+    определяется выборкой limit + 1, а не числом страниц пагинатора.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class CachedCountPagination(LimitPageNumberPagination):
+    """
+    Пагинация с кешированием COUNT(*) по нормализованному набору
+    параметров фильтрации. Для запросов без фильтров на больших
+    таблицах используется оценка планировщика PostgreSQL.
+    В ответ добавляется поле count_is_exact.
+
+    Оценка и число из кеша могут отставать от таблицы, поэтому
+    они попадают только в поле count: страница выбирается
+    смещением, а наличие следующей — выборкой limit + 1.
+    """
+    count_cache_timeout = 30
+    approximate_count_threshold = 10000
+    non_filter_params = ('page', 'limit', 'cursor')
+    user_dependent_params = ('is_favorited', 'is_in_shopping_cart')
+
+    @property
+    def django_paginator_class(self):
+        return partial(CountPaginator, count_func=self.get_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_is_exact = True
+        self.filter_params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.non_filter_params
+            for value in values
+        )
+        self.count_key = self.get_count_key(request)
+        page_size = self.get_page_size(request)
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_size and page_number not in self.last_page_strings:
+            count = self.get_approximate_count(queryset)
+            if count is not None:
+                self.count_is_exact = False
+                return self.paginate_approximate(
+                    queryset, request, page_size, page_number, count
+                )
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_count_key(self, request):
+        """Ключ кеша: путь запроса и отсортированные параметры фильтров."""
+        parts = [request.path, repr(self.filter_params)]
+        if any(
+            key in self.user_dependent_params for key, _ in self.filter_params
+        ):
+            parts.append(str(request.user.pk))
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return f'pagination-count:{digest}'
+
+    def get_approximate_count(self, queryset):
+        """Оценка планировщика или число из кеша; None, если их нет."""
+        if not self.filter_params:
+            estimate = self.estimate_count(queryset)
+            if (
+                estimate is not None
+                and estimate >= self.approximate_count_threshold
+            ):
+                return estimate
+        return cache.get(self.count_key)
+
+    def get_count(self, queryset):
+        count = queryset.count()
+        cache.set(self.count_key, count, self.count_cache_timeout)
+        return count
+
+    def paginate_approximate(self, queryset, request, page_size,
+                             page_number, count):
+        try:
+            number = int(page_number)
+        except (TypeError, ValueError):
+            number = 0
+        if number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message='That page number is not a valid integer',
+            ))
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message='That page contains no results',
+            ))
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        # count не меньше уже увиденных строк, иначе номер страницы
+        # оказался бы больше числа страниц.
+        count = max(count, offset + len(rows) + has_next)
+        paginator = CountPaginator(
+            queryset, page_size, count_func=lambda queryset: count
+        )
+        self.page = EstimatedPage(rows, number, paginator, has_next)
+        self.request = request
+        if self.template is not None and paginator.num_pages > 1:
+            self.display_page_controls = True
+        return rows
+
+    def estimate_count(self, queryset):
+        """Оценка числа строк таблицы по статистике PostgreSQL."""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_exact', self.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная (keyset) пагинация рецептов без подсчёта COUNT(*)."""
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+
+class LimitOrCursorPagination(CachedCountPagination):
+    """
+    Пагинация по страницам (page/limit) по умолчанию.
+    Если в запросе передан параметр cursor, используется
+    курсорная пагинация.
+    """
+    cursor_pagination_class = RecipeCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if CursorPagination.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view=view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,11 +1,31 @@
-from django.shortcuts import get_object_or_404
+from hashlib import md5
+
+from django.core.cache import caches
+from django.db import models
 from drf_extra_fields.fields import Base64ImageField
 from recipes.models import (Favourite, Ingredient, IngredientInRecipe, Recipe,
                             ShoppingList, Tag)
+from recipes.registry import tag_registry
+from recipes.versions import INGREDIENT_AMOUNTS, INGREDIENTS, TAGS, get_version
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from users.models import Follow, User
 
+from .viewer import get_viewer
+
+
+class TagPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле тега, разрешающее id через реестр тегов в памяти."""
+
+    def to_internal_value(self, data):
+        try:
+            tag = tag_registry.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return tag
+
 
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор модели тегов."""
@@ -46,8 +66,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if request is None or request.user.is_anonymous:
             return False
-        user = request.user
-        return Follow.objects.filter(user=user, author=obj).exists()
+        return get_viewer(request).is_subscribed(obj.id)
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -75,15 +94,40 @@ class FollowSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        return Follow.objects.filter(user=obj.user, author=obj.author).exists()
+        request = self.context.get("request")
+        if request is None or request.user.id != obj.user_id:
+            return Follow.objects.filter(
+                user=obj.user, author=obj.author).exists()
+        return get_viewer(request).is_subscribed(obj.author_id)
+
+    max_recipes_limit = 20
+
+    @classmethod
+    def get_recipes_limit(cls, request):
+        """
+        Число рецептов автора в ответе: параметр recipes_limit,
+        ограниченный сверху max_recipes_limit (он же значение
+        по умолчанию).
+        """
+        try:
+            limit = int(request.query_params["recipes_limit"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return cls.max_recipes_limit
+        return min(max(limit, 0), cls.max_recipes_limit)
 
     def get_recipes(self, obj):
-        queryset = (
-            Recipe.objects.filter(author=obj.author).order_by("-pub_date"))
+        recipes_by_author = self.context.get("recipes_by_author")
+        if recipes_by_author is not None:
+            queryset = recipes_by_author[obj.author_id]
+        else:
+            limit = self.get_recipes_limit(self.context.get("request"))
+            queryset = Recipe.objects.filter(
+                author_id=obj.author_id
+            ).order_by("-pub_date", "-id")[:limit]
         return ShortRecipeSerializer(queryset, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
@@ -132,6 +176,36 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         return name
 
 
+class RecipesReadListSerializer(serializers.ListSerializer):
+    """
+    Список рецептов: кешированные фрагменты читаются одним get_many,
+    новые записываются одним set_many.
+    """
+
+    def to_representation(self, data):
+        recipes = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        child = self.child
+        keys = [child.get_fragment_key(recipe) for recipe in recipes]
+        cache = caches[child.fragment_cache_alias]
+        cached = cache.get_many([key for key in keys if key is not None])
+        result = []
+        missing = {}
+        for recipe, key in zip(recipes, keys):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = child.render_fragment(recipe)
+                if key is not None:
+                    missing[key] = fragment
+            else:
+                fragment = child.with_viewer_flags(recipe, fragment)
+            result.append(fragment)
+        if missing:
+            cache.set_many(missing)
+        return result
+
+
 class RecipesReadSerializer(serializers.ModelSerializer):
     """Сериализатор для рецептов (просмотр)."""
     tags = TagSerializer(many=True, read_only=True)
@@ -154,31 +228,93 @@ class RecipesReadSerializer(serializers.ModelSerializer):
             "text",
             "cooking_time",
         )
+        list_serializer_class = RecipesReadListSerializer
+
+    fragment_cache_alias = "fragments"
+    fragment_versions = (TAGS, INGREDIENTS, INGREDIENT_AMOUNTS)
 
     def get_user(self):
         return self.context["request"].user
 
+    def get_fragment_prefix(self):
+        """Общая для всех рецептов запроса часть ключа: версии связанных
+        справочников и адрес сайта (для ссылок). Считается один раз
+        на запрос и хранится в контексте сериализатора."""
+        request = self.context.get("request")
+        if request is None:
+            return None
+        prefix = self.context.get("fragment_prefix")
+        if prefix is None:
+            versions = [get_version(name) for name in self.fragment_versions]
+            raw = f"{versions!r}|{request.build_absolute_uri('/')}"
+            prefix = md5(raw.encode()).hexdigest()
+            self.context["fragment_prefix"] = prefix
+        return prefix
+
+    def get_fragment_key(self, recipe):
+        """Ключ кеша сериализованного рецепта: id, время изменения
+        и общая часть ключа запроса."""
+        prefix = self.get_fragment_prefix()
+        if prefix is None or recipe.updated_at is None:
+            return None
+        raw = f"{recipe.updated_at.timestamp()}|{prefix}"
+        return f"recipe-fragment:{recipe.pk}:{md5(raw.encode()).hexdigest()}"
+
+    def render_fragment(self, recipe):
+        return super().to_representation(recipe)
+
+    def with_viewer_flags(self, recipe, data):
+        """Копия кешированного фрагмента с флагами текущего
+        пользователя."""
+        data = data.copy()
+        data["author"] = data["author"].copy()
+        data["author"]["is_subscribed"] = (
+            self.fields["author"].get_is_subscribed(recipe.author)
+        )
+        data["is_favorited"] = self.get_is_favorited(recipe)
+        data["is_in_shopping_cart"] = self.get_is_in_shopping_cart(recipe)
+        return data
+
+    def to_representation(self, recipe):
+        """
+        Общая для всех пользователей часть рецепта берётся из кеша,
+        поверх неё подставляются флаги текущего пользователя.
+        """
+        key = self.get_fragment_key(recipe)
+        if key is None:
+            return self.render_fragment(recipe)
+        cache = caches[self.fragment_cache_alias]
+        data = cache.get(key)
+        if data is None:
+            data = self.render_fragment(recipe)
+            cache.set(key, data)
+            return data
+        return self.with_viewer_flags(recipe, data)
+
     def get_is_favorited(self, obj):
         """Проверяет находится ли рецепт в избранном."""
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
-        return Favourite.objects.filter(recipe=obj, user=request.user).exists()
+        return get_viewer(request).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
         """Проверяет находится ли рецепт в продуктовой корзине."""
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
-        return ShoppingList.objects.filter(recipe=obj,
-                                           user=request.user).exists()
+        return get_viewer(request).is_in_shopping_cart(obj.id)
 
 
 class RecipesWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для рецептов (создание)."""
     author = CustomUserSerializer(read_only=True, required=False)
     ingredients = IngredientInRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = TagPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True)
     image = Base64ImageField(max_length=None, use_url=True)
 
@@ -208,11 +344,15 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
             except Exception:
                 raise ValidationError(
                     {"amount": "Колличество должно" "быть числом"})
-            check_id = ingredient["id"]
-            check_ingredient = Ingredient.objects.filter(id=check_id)
-            if not check_ingredient.exists():
-                raise serializers.ValidationError(
-                    "Данного продукта нет в базе!")
+        ingredient_ids = {ingredient["id"] for ingredient in data}
+        existing_ids = set(
+            Ingredient.objects.filter(
+                id__in=ingredient_ids
+            ).values_list("id", flat=True)
+        )
+        if ingredient_ids - existing_ids:
+            raise serializers.ValidationError(
+                "Данного продукта нет в базе!")
         return data
 
     def validate_cooking_time(self, data):
@@ -234,38 +374,68 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         return data
 
     def validate_tags(self, data):
-        """Валидатор тегов."""
-        tags = self.initial_data.get("tags")
-        if not tags:
+        """Валидатор тегов.
+
+        Существование тегов проверяет TagPrimaryKeyRelatedField
+        по реестру тегов, без запросов к БД.
+        """
+        if not data:
             raise ValidationError("Рецепт не может быть без тегов")
-        for tag_id in tags:
-            if not Tag.objects.filter(id=tag_id).exists():
-                raise serializers.ValidationError(
-                    f"Тег с id = {tag_id} не существует")
-        tags_bd = set(tags)
-        if len(tags) != len(tags_bd):
+        if len(data) != len({tag.id for tag in data}):
             raise ValidationError("Теги должны быть уникальными")
         return data
 
     def create_amount_ingredients(self, ingredients, recipe):
-        """Создание ингредиентов в рецепте."""
-        for ingredient in ingredients:
-            current_ingredient = get_object_or_404(
-                Ingredient.objects.filter(id=ingredient['id'])[:1]
+        """Создание ингредиентов в рецепте.
+
+        Недостающие пары (ингредиент, количество) создаются одним
+        bulk_create, а связи с рецептом — одной вставкой
+        в промежуточную таблицу.
+        """
+        pairs = {
+            (ingredient["id"], ingredient["amount"])
+            for ingredient in ingredients
+        }
+        candidates = IngredientInRecipe.objects.filter(
+            ingredient_id__in={pair[0] for pair in pairs},
+            amount__in={pair[1] for pair in pairs},
+        ).values_list("ingredient_id", "amount", "id")
+        amount_ids = {
+            (ingredient_id, amount): pk
+            for ingredient_id, amount, pk in candidates
+            if (ingredient_id, amount) in pairs
+        }
+        missing = pairs - amount_ids.keys()
+        if missing:
+            IngredientInRecipe.objects.bulk_create(
+                [
+                    IngredientInRecipe(ingredient_id=ingredient_id,
+                                       amount=amount)
+                    for ingredient_id, amount in missing
+                ],
+                ignore_conflicts=True,
             )
-            ing, _ = IngredientInRecipe.objects.get_or_create(
-                ingredient=current_ingredient,
-                amount=ingredient["amount"],
+            created = IngredientInRecipe.objects.filter(
+                ingredient_id__in={pair[0] for pair in missing},
+                amount__in={pair[1] for pair in missing},
+            ).values_list("ingredient_id", "amount", "id")
+            amount_ids.update(
+                ((ingredient_id, amount), pk)
+                for ingredient_id, amount, pk in created
+                if (ingredient_id, amount) in missing
             )
-            recipe.ingredients.add(ing.id)
+        through = Recipe.ingredients.through
+        through.objects.bulk_create([
+            through(recipe_id=recipe.id, ingredientinrecipe_id=pk)
+            for pk in amount_ids.values()
+        ])
 
     def create(self, validated_data):
         """Создание рецепта."""
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
         recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            recipe.tags.set(tags)
+        recipe.tags.set(tags)
         self.create_amount_ingredients(ingredients, recipe)
         return recipe
 
@@ -281,6 +451,7 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         return super().update(recipe, validated_data)
 
     def to_representation(self, recipe):
+        recipe = Recipe.objects.with_related().get(pk=recipe.pk)
         serializer = RecipesReadSerializer(recipe, context=self.context)
         return serializer.data
 
@@ -0,0 +1,191 @@
+import csv
+import hashlib
+import io
+import json
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.loaders import Echo
+from recipes.models import IngredientInRecipe
+
+CHUNK_SIZE = 2000
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 18
+
+
+def get_shopping_cart_ingredients(user):
+    """Суммарное количество каждого ингредиента в корзине пользователя."""
+    return (
+        IngredientInRecipe.objects.filter(
+            recipes__shopping_list_recipe__user=user
+        )
+        .values(
+            'ingredient__name',
+            'ingredient__measurement_unit'
+        )
+        .annotate(ingredient_total=Sum('amount'))
+        .order_by('ingredient__name')
+    )
+
+
+def iter_txt(ingredients):
+    yield 'Список покупок: \n'
+    for ingredient in ingredients:
+        yield (
+            f'{ingredient["ingredient__name"]} - '
+            f'{ingredient["ingredient_total"]} '
+            f'({ingredient["ingredient__measurement_unit"]}) \n'
+        )
+
+
+def iter_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['ingredient_total'],
+        ))
+
+
+def iter_json(ingredients):
+    yield '['
+    separator = ''
+    for ingredient in ingredients:
+        yield separator + json.dumps({
+            'name': ingredient['ingredient__name'],
+            'measurement_unit': ingredient['ingredient__measurement_unit'],
+            'amount': ingredient['ingredient_total'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+def get_pdf_font():
+    """
+    Регистрирует TTF-шрифт с кириллицей (один раз на процесс).
+    Встроенные шрифты PDF кириллицу не отображают, поэтому без файла
+    шрифта PDF не формируется.
+    """
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    font_path = settings.SHOPPING_CART_PDF_FONT
+    if not os.path.exists(font_path):
+        raise ImproperlyConfigured(
+            f'Не найден шрифт для PDF списка покупок: {font_path}. '
+            'Укажите путь к TTF-шрифту с кириллицей '
+            'в SHOPPING_CART_PDF_FONT.'
+        )
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, font_path))
+    return PDF_FONT_NAME
+
+
+def render_pdf(ingredients):
+    """Формирует PDF со списком покупок."""
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer, pagesize=A4)
+    font = get_pdf_font()
+    width, height = A4
+    y = height - PDF_MARGIN
+    page.setFont(font, PDF_FONT_SIZE + 4)
+    page.drawString(PDF_MARGIN, y, 'Список покупок:')
+    page.setFont(font, PDF_FONT_SIZE)
+    for ingredient in ingredients:
+        text = (
+            f'{ingredient["ingredient__name"]} - '
+            f'{ingredient["ingredient_total"]} '
+            f'({ingredient["ingredient__measurement_unit"]})'
+        )
+        # Длинные названия переносятся по ширине страницы.
+        for line in simpleSplit(
+            text, font, PDF_FONT_SIZE, width - 2 * PDF_MARGIN
+        ):
+            y -= PDF_LINE_HEIGHT
+            if y < PDF_MARGIN:
+                page.showPage()
+                page.setFont(font, PDF_FONT_SIZE)
+                y = height - PDF_MARGIN
+            page.drawString(PDF_MARGIN, y, line)
+    page.showPage()
+    page.save()
+    return buffer.getvalue()
+
+
+def shopping_cart_pdf(user):
+    """
+    PDF со списком покупок. Готовый файл кешируется по хешу
+    агрегированных строк корзины и шрифта, поэтому повторная выгрузка
+    неизменной корзины не рендерится заново.
+    """
+    ingredients = list(get_shopping_cart_ingredients(user))
+    digest = hashlib.sha256(
+        json.dumps(
+            [
+                (
+                    ingredient['ingredient__name'],
+                    ingredient['ingredient__measurement_unit'],
+                    ingredient['ingredient_total'],
+                )
+                for ingredient in ingredients
+            ],
+            ensure_ascii=False,
+        ).encode()
+    ).hexdigest()
+    font = hashlib.sha256(
+        settings.SHOPPING_CART_PDF_FONT.encode()
+    ).hexdigest()[:16]
+    cache_key = f'shopping-cart-pdf:{font}:{digest}'
+    content = cache.get(cache_key)
+    if content is None:
+        content = render_pdf(ingredients)
+        cache.set(
+            cache_key, content, settings.SHOPPING_CART_PDF_CACHE_TIMEOUT
+        )
+    return content
+
+
+EXPORT_FORMATS = {
+    'txt': (iter_txt, 'text/plain; charset=utf8'),
+    'csv': (iter_csv, 'text/csv; charset=utf8'),
+    'json': (iter_json, 'application/json; charset=utf8'),
+}
+EXPORT_FORMAT_NAMES = (*EXPORT_FORMATS, 'pdf')
+
+
+def shopping_cart_response(user, export_format='txt'):
+    """
+    Потоковая выгрузка списка покупок. Агрегирующий запрос читается
+    итератором (серверным курсором в PostgreSQL), поэтому память
+    не зависит от размера корзины.
+    """
+    if export_format == 'pdf':
+        response = HttpResponse(
+            shopping_cart_pdf(user), content_type='application/pdf'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename=shopping_list.pdf'
+        )
+        return response
+    generator, content_type = EXPORT_FORMATS[export_format]
+    ingredients = get_shopping_cart_ingredients(user).iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    response = StreamingHttpResponse(
+        generator(ingredients), content_type=content_type
+    )
+    filename = f'shopping_list.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
@@ -0,0 +1,145 @@
+import json
+import logging
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connection, transaction
+
+from .metrics import call_on_close, get_view_action, wrap_streaming
+from .models import SlowQuery
+
+STACK_DEPTH = 15
+LOCKING_CLAUSE = re.compile(
+    r'\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b',
+    re.IGNORECASE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_stack():
+    """Кадры стека из кода проекта (без Django, DRF и этого модуля)."""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return ''.join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+
+def explain(sql, params):
+    """
+    План запроса. EXPLAIN ANALYZE повторно выполняет запрос,
+    поэтому план снимается только для SELECT без блокировок строк
+    (FOR UPDATE, FOR SHARE).
+    """
+    if (
+        not sql.lstrip().upper().startswith('SELECT')
+        or LOCKING_CLAUSE.search(sql)
+    ):
+        return ''
+    if connection.vendor == 'postgresql':
+        prefix = connection.ops.explain_query_prefix(
+            analyze=True, buffers=True
+        )
+    else:
+        prefix = connection.ops.explain_query_prefix()
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+    except DatabaseError as error:
+        return f'EXPLAIN не выполнен: {error}'
+
+
+class SlowQueryRecorder:
+    """Обёртка connection.execute_wrapper: запоминает запросы
+    длительностью от SLOW_QUERY_THRESHOLD_MS."""
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.queries.append(
+                    (duration, sql, params, many, get_stack())
+                )
+
+    def save(self):
+        if not self.queries:
+            return
+        try:
+            self.write()
+        except DatabaseError:
+            logger.exception('Не удалось сохранить медленные запросы')
+
+    def write(self):
+        view, action = get_view_action(self.request)
+        view = '.'.join(name for name in (view, action) if name)
+        objects = []
+        for duration, sql, params, many, stack in self.queries:
+            plan = ''
+            if (
+                not many
+                and duration >= settings.SLOW_QUERY_EXPLAIN_THRESHOLD_MS
+            ):
+                plan = explain(sql, params)
+            objects.append(SlowQuery(
+                duration=duration,
+                sql=sql,
+                params=json.dumps(params, ensure_ascii=False, default=str),
+                view=view[:200],
+                path=self.request.get_full_path(),
+                stack=stack,
+                plan=plan,
+            ))
+        SlowQuery.objects.bulk_create(objects)
+        trim()
+
+
+def trim():
+    """Кольцевой буфер: хранятся последние SLOW_QUERY_BUFFER_SIZE записей."""
+    last_id = SlowQuery.objects.values_list('id', flat=True).first()
+    if last_id is not None:
+        SlowQuery.objects.filter(
+            id__lte=last_id - settings.SLOW_QUERY_BUFFER_SIZE
+        ).delete()
+
+
+class SlowQueryMiddleware:
+    """
+    Запись медленных SQL-запросов для просмотра в админке.
+
+    Включается настройкой SLOW_QUERY_ENABLED. Записи (и EXPLAIN ANALYZE,
+    который повторяет медленный запрос) сохраняются при закрытии ответа,
+    то есть после отправки тела клиенту, и не увеличивают задержку
+    запроса. Это происходит вне обёртки, поэтому собственные запросы
+    регистратора в буфер не попадают.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(request)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        wrap_streaming(response, recorder)
+        if response.streaming or recorder.queries:
+            call_on_close(response, recorder.save)
+        return response
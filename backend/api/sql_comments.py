@@ -0,0 +1,83 @@
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import get_view_action, wrap_streaming
+
+
+def format_comment(**tags):
+    """
+    Комментарий в формате sqlcommenter: /*action='list',route='...'*/.
+
+    Ключи отсортированы, значения экранированы URL-кодированием, поэтому
+    в комментарии не бывает кавычек и «*/». В нём нет id, путей
+    и параметров запроса — только имена представления, действия и
+    шаблон маршрута, так что одинаковые запросы одного эндпоинта
+    дают одинаковый текст.
+    """
+    pairs = ','.join(
+        f"{key}='{quote(str(value), safe='')}'"
+        for key, value in sorted(tags.items()) if value
+    )
+    return f'/*{pairs}*/' if pairs else ''
+
+
+def get_comment(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return ''
+    view, action = get_view_action(request)
+    return format_comment(action=action, route=match.route, view=view)
+
+
+class SQLCommenter:
+    """Обёртка connection.execute_wrapper: добавляет комментарий
+    перед текстом каждого запроса."""
+
+    def __init__(self, request):
+        self.request = request
+        self.comment = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.comment is None:
+            # До разрешения URL маршрут неизвестен, такие запросы
+            # отправляются без комментария.
+            if getattr(self.request, 'resolver_match', None) is None:
+                return execute(sql, params, many, context)
+            self.comment = get_comment(self.request)
+        if self.comment:
+            # С параметрами драйвер подставляет их через %s, поэтому
+            # «%» из URL-кодирования нужно удвоить.
+            comment = self.comment
+            if params is not None:
+                comment = comment.replace('%', '%%')
+            sql = f'{comment} {sql}'
+        return execute(sql, params, many, context)
+
+
+class SQLCommentMiddleware:
+    """
+    Помечает SQL-запросы представлением, действием DRF и маршрутом,
+    чтобы нагрузку в pg_stat_statements и логах PostgreSQL можно было
+    отнести к эндпоинту.
+
+    Включается настройкой SQL_COMMENTS_ENABLED. pg_stat_statements
+    не учитывает комментарии при вычислении queryid: запросы по-прежнему
+    агрегируются, а сохранённый текст содержит комментарий первого
+    вызова. Одинаковый SQL из разных эндпоинтов попадает в одну строку,
+    такие случаи видны в журнале (log_min_duration_statement).
+    """
+
+    def __init__(self, get_response):
+        if not settings.SQL_COMMENTS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        commenter = SQLCommenter(request)
+        with connection.execute_wrapper(commenter):
+            response = self.get_response(request)
+        wrap_streaming(response, commenter)
+        return response
@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import (Favourite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingList, Tag)
+from users.models import Follow, User
+
+RECIPES_TOTAL = 120
+
+
+class RecipeListQueriesTest(TestCase):
+    """Число SQL-запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                password='password',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for number in range(3)
+        ]
+        cls.user = authors[0]
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}',
+            )
+            for number in range(3)
+        ]
+        amounts = [
+            IngredientInRecipe.objects.create(
+                ingredient=Ingredient.objects.create(
+                    name=f'Ингредиент {number}', measurement_unit='г'
+                ),
+                amount=number + 1,
+            )
+            for number in range(10)
+        ]
+        for number in range(RECIPES_TOTAL):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}',
+                image='recipes/test.png',
+                text='Описание',
+                cooking_time=10,
+            )
+            recipe.tags.set(tags[:number % len(tags) + 1])
+            recipe.ingredients.set(amounts[number % 5:number % 5 + 4])
+            if number % 3 == 0:
+                Favourite.objects.create(user=cls.user, recipe=recipe)
+            if number % 4 == 0:
+                ShoppingList.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, author=authors[1])
+
+    def count_queries(self, client, limit):
+        # Каждый замер с холодным кешем: иначе второй запрос берёт
+        # готовое число записей из кеша пагинатора.
+        for alias in ('default', 'responses', 'fragments'):
+            caches[alias].clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), limit)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, client):
+        self.assertEqual(
+            self.count_queries(client, 6), self.count_queries(client, 100)
+        )
+
+    def test_anonymous(self):
+        self.assert_constant_queries(APIClient())
+
+    def test_authenticated(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assert_constant_queries(client)
@@ -3,8 +3,8 @@ from django.conf.urls.static import static
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CustomUserViewSet, IngredientsViewSet, RecipesViewSet,
-                    TagsViewSet)
+from .views import (CustomUserViewSet, IngredientsViewSet, MetricsView,
+                    RecipesViewSet, TagsViewSet)
 
 app_name = "api"
 
@@ -15,6 +15,7 @@ router.register("recipes", RecipesViewSet, basename="recipes")
 router.register("ingredients", IngredientsViewSet, basename="ingredients")
 
 urlpatterns = [
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
@@ -0,0 +1,55 @@
+from django.utils.functional import cached_property
+
+from recipes.models import Favourite, ShoppingList
+from users.models import Follow
+
+
+class ViewerContext:
+    """
+    Данные текущего пользователя в пределах одного запроса:
+    id авторов, на которых он подписан, id избранных рецептов
+    и рецептов в корзине. Каждый набор загружается одним запросом
+    при первом обращении.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def _ids(self, queryset, field):
+        if self.user.is_anonymous:
+            return frozenset()
+        return frozenset(queryset.values_list(field, flat=True))
+
+    @cached_property
+    def following_ids(self):
+        return self._ids(Follow.objects.filter(user=self.user), 'author_id')
+
+    @cached_property
+    def favorite_ids(self):
+        return self._ids(
+            Favourite.objects.filter(user=self.user), 'recipe_id'
+        )
+
+    @cached_property
+    def shopping_cart_ids(self):
+        return self._ids(
+            ShoppingList.objects.filter(user=self.user), 'recipe_id'
+        )
+
+    def is_subscribed(self, author_id):
+        return author_id in self.following_ids
+
+    def is_favorited(self, recipe_id):
+        return recipe_id in self.favorite_ids
+
+    def is_in_shopping_cart(self, recipe_id):
+        return recipe_id in self.shopping_cart_ids
+
+
+def get_viewer(request):
+    """ViewerContext запроса (создаётся один раз на запрос)."""
+    viewer = getattr(request, 'viewer', None)
+    if viewer is None:
+        viewer = ViewerContext(request.user)
+        request.viewer = viewer
+    return viewer
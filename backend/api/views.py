@@ -1,28 +1,70 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import (SAFE_METHODS, IsAuthenticated)
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from recipes.models import (Favourite, Ingredient, Recipe,
-                            IngredientInRecipe, ShoppingList, Tag)
+                            ShoppingList, Tag)
+from recipes.reference import (ingredients_reference, render_json,
+                               tags_reference)
+from recipes.search import ingredient_index
+from recipes.versions import RECIPES
 from users.models import Follow, User
+from .caching import AnonymousResponseCacheMixin
+from .conditional import ConditionalMixin
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import LimitPageNumberPagination
+from .metrics import registry
+from .negotiation import IgnoreClientContentNegotiation
+from .pagination import LimitOrCursorPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (CustomUserSerializer, FollowSerializer,
                           IngredientSerializer, RecipesReadSerializer,
                           RecipesWriteSerializer, FavouriteSerializer,
                           TagSerializer)
+from .shopping_cart import EXPORT_FORMAT_NAMES, shopping_cart_response
 
 
-class IngredientsViewSet(viewsets.ModelViewSet):
+class ReferenceDataMixin:
+    """
+    Отдаёт список и отдельные объекты справочника
+    из готового JSON в памяти (recipes.reference).
+    """
+    reference_data = None
+
+    def get_version_names(self, request):
+        return (self.reference_data.version_name,)
+
+    def get_list_content(self, request):
+        return self.reference_data.list_json()
+
+    def list(self, request, *args, **kwargs):
+        return HttpResponse(
+            self.get_list_content(request), content_type="application/json"
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            content = self.reference_data.detail_json(int(kwargs["pk"]))
+        except ValueError:
+            content = None
+        if content is None:
+            raise Http404
+        return HttpResponse(content, content_type="application/json")
+
+
+class IngredientsViewSet(ConditionalMixin, ReferenceDataMixin,
+                         viewsets.ModelViewSet):
     """Вьюсет для модели ингридиента."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -30,13 +72,26 @@ class IngredientsViewSet(viewsets.ModelViewSet):
     filterset_class = IngredientFilter
     search_fields = ("^name",)
     pagination_class = None
+    reference_data = ingredients_reference
+    autocomplete_limit = 100
+
+    def get_list_content(self, request):
+        """Автодополнение по ?name= обслуживается из индекса в памяти."""
+        name = request.query_params.get("name")
+        if name:
+            return render_json(
+                ingredient_index.search(name, limit=self.autocomplete_limit)
+            )
+        return super().get_list_content(request)
 
 
-class TagsViewSet(viewsets.ModelViewSet):
+class TagsViewSet(ConditionalMixin, ReferenceDataMixin,
+                  viewsets.ModelViewSet):
     """Вьюсет для модели тега."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    reference_data = tags_reference
 
 
 class CustomUserViewSet(UserViewSet):
@@ -52,10 +107,20 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """Метод для просмотра подписок на авторов."""
         user = self.request.user
-        queryset = Follow.objects.filter(user=user)
+        queryset = (
+            Follow.objects.filter(user=user)
+            .select_related("author")
+        )
         pages = self.paginate_queryset(queryset)
+        recipes_by_author = Recipe.objects.recent_by_authors(
+            [follow.author_id for follow in pages],
+            FollowSerializer.get_recipes_limit(request),
+        )
         serializer = FollowSerializer(
-            pages, many=True, context={"request": request}
+            pages, many=True, context={
+                "request": request,
+                "recipes_by_author": recipes_by_author,
+            }
         )
         return self.get_paginated_response(serializer.data)
 
@@ -64,6 +129,7 @@ class CustomUserViewSet(UserViewSet):
         detail=True,
         permission_classes=(IsAuthenticated,)
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         """Метод для подписки/отписки от автора."""
         author = get_object_or_404(User, id=id)
@@ -95,22 +161,50 @@ class CustomUserViewSet(UserViewSet):
                 )
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(ConditionalMixin, AnonymousResponseCacheMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для модели рецепта."""
-    queryset = Recipe.objects.all().order_by("-id")
+    queryset = Recipe.objects.with_related().order_by("-id")
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = LimitPageNumberPagination
+    pagination_class = LimitOrCursorPagination
+    user_dependent = True
+
+    def get_version_names(self, request):
+        return (RECIPES,)
+
+    def get_queryset(self):
+        """Аннотирует рецепты флагами избранного и корзины
+        для текущего пользователя."""
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favourite.objects.filter(
+                user=user, recipe=OuterRef("pk"))),
+            is_in_shopping_cart=Exists(ShoppingList.objects.filter(
+                user=user, recipe=OuterRef("pk"))),
+        )
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipesReadSerializer
         return RecipesWriteSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @transaction.atomic
     def add_recipe(self, model, user, pk):
         """Метод для добавления рецепта."""
         if model.objects.filter(user=user, recipe__id=pk).exists():
@@ -122,6 +216,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
         serializer = FavouriteSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def delete_recipe(self, model, user, pk):
         """Метод для удаления рецепта."""
         obj = model.objects.filter(user=user, recipe__id=pk)
@@ -162,33 +257,33 @@ class RecipesViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=["GET"],
         url_path="download_shopping_cart",
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        content_negotiation_class=IgnoreClientContentNegotiation,
     )
     def download_shopping_cart(self, request):
         """Метод для получения и скачивания
-        списка продуктов из продуктовой корзины."""
-        user = request.user
-        ingredients_list = (
-            IngredientInRecipe.objects.filter(
-                recipes__shopping_list_recipe__user=user
-            )
-            .values(
-                'ingredient__name',
-                'ingredient__measurement_unit'
-            )
-            .annotate(ingredient_total=Sum('amount'))
-        )
-        ingredients_list = ingredients_list.order_by('ingredient__name')
-        shopping_list = 'Список покупок: \n'
-        for ingredient in ingredients_list:
-            shopping_list += (
-                f'{ingredient["ingredient__name"]} - '
-                f'{ingredient["ingredient_total"]} '
-                f'({ingredient["ingredient__measurement_unit"]}) \n'
-            )
-        response = HttpResponse(
-            shopping_list, content_type='text/plain; charset=utf8'
+        списка продуктов из продуктовой корзины.
+        Формат выбирается параметром ?format=txt|csv|json|pdf
+        (по умолчанию txt, заголовок Accept не учитывается)."""
+        export_format = request.query_params.get("format", "txt")
+        if export_format not in EXPORT_FORMAT_NAMES:
+            return Response({
+                "errors": (
+                    "Неизвестный формат списка покупок. Доступные: "
+                    + ", ".join(EXPORT_FORMAT_NAMES)
+                )
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return shopping_cart_response(request.user, export_format)
+
+
+class MetricsView(APIView):
+    """Метрики запросов в текстовом формате Prometheus (только для staff)."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        if not settings.METRICS_ENABLED:
+            raise Http404
+        return HttpResponse(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
         )
-        filename = "shopping_list.txt"
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
@@ -41,6 +41,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.slow_queries.SlowQueryMiddleware",
+    "api.metrics.MetricsMiddleware",
+    "api.sql_comments.SQLCommentMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,6 +85,75 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кеш ответов для анонимных пользователей. Для файлового кеша:
+    # RESPONSE_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+    # RESPONSE_CACHE_LOCATION=/var/tmp/foodgram_cache
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', default='responses'),
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300)),
+    },
+    # Сериализованные рецепты (RecipesReadSerializer): отдельно от кеша
+    # ответов, чтобы одна большая страница не вытесняла ответы.
+    # Ключ меняется вместе с рецептом, устаревшие записи истекают.
+    'fragments': {
+        'BACKEND': os.getenv(
+            'FRAGMENT_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', default='fragments'),
+        'TIMEOUT': int(os.getenv('FRAGMENT_CACHE_TIMEOUT', default=3600)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', default=10000)
+            ),
+        },
+    },
+    # Метки версий данных (recipes.versions) должны быть общими для всех
+    # процессов: воркеров gunicorn и команд manage.py. Файловый кеш общий
+    # в пределах одного контейнера; для нескольких серверов задайте
+    # общий бэкенд (например, Memcached).
+    'versions': {
+        'BACKEND': os.getenv(
+            'VERSION_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'VERSION_CACHE_LOCATION', default='/tmp/foodgram_versions'
+        ),
+        # Общих меток несколько штук, до вытеснения дело не доходит.
+        'TIMEOUT': None,
+    },
+    # Персональные метки (избранное, корзина, подписки) — по одной
+    # на пользователя, поэтому с ограниченным сроком: истёкшая метка
+    # создаётся заново и лишь сбрасывает ETag этого пользователя.
+    # Файловый кеш перебирает каталог при каждой записи; при большом
+    # числе пользователей лучше задать Memcached или Redis.
+    'user_versions': {
+        'BACKEND': os.getenv(
+            'VERSION_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'USER_VERSION_CACHE_LOCATION',
+            default='/tmp/foodgram_user_versions',
+        ),
+        'TIMEOUT': int(os.getenv('USER_VERSION_CACHE_TIMEOUT', default=86400)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.getenv('USER_VERSION_CACHE_MAX_ENTRIES', default=10000)
+            ),
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.'
@@ -152,3 +224,32 @@ DJOSER = {
         "token_destroy": ["rest_framework.permissions.IsAuthenticated"],
     },
 }
+
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
+SHOPPING_CART_PDF_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Метрики запросов для Prometheus: /api/metrics (только для staff).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', default='False') == 'True'
+
+# Запись медленных SQL-запросов (админка: Api → Медленные запросы).
+# Для запросов дольше SLOW_QUERY_EXPLAIN_THRESHOLD_MS сохраняется план;
+# на PostgreSQL это EXPLAIN (ANALYZE, BUFFERS), запрос выполняется повторно.
+SLOW_QUERY_ENABLED = (
+    os.getenv('SLOW_QUERY_ENABLED', default='False') == 'True'
+)
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.getenv('SLOW_QUERY_THRESHOLD_MS', default=100)
+)
+SLOW_QUERY_EXPLAIN_THRESHOLD_MS = float(
+    os.getenv('SLOW_QUERY_EXPLAIN_THRESHOLD_MS', default=500)
+)
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', default=500))
+
+# Комментарии sqlcommenter (представление, действие, маршрут) в SQL-запросах.
+SQL_COMMENTS_ENABLED = (
+    os.getenv('SQL_COMMENTS_ENABLED', default='False') == 'True'
+)
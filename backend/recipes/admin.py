@@ -11,17 +11,22 @@ class RecipeAdmin(admin.ModelAdmin):
         'author',
         'added_in_favorites'
     )
+    list_select_related = ('author',)
     readonly_fields = ('added_in_favorites',)
-    list_filter = (
-        'author',
+    list_filter = ('tags',)
+    search_fields = (
         'name',
-        'tags',
+        'author__username',
+        'author__email',
     )
+    autocomplete_fields = ('author', 'ingredients')
+    show_full_result_count = False
 
     def added_in_favorites(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
     added_in_favorites.short_description = 'Добавлено в Избранные'
+    added_in_favorites.admin_order_field = 'favorites_count'
 
 
 @admin.register(Ingredient)
@@ -30,7 +35,8 @@ class IngredientAdmin(admin.ModelAdmin):
         'name',
         'measurement_unit',
     )
-    list_filter = ('name',)
+    search_fields = ('^name',)
+    show_full_result_count = False
 
 
 @admin.register(Tag)
@@ -48,6 +54,9 @@ class ShoppingListAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(Favourite)
@@ -56,6 +65,9 @@ class FavouriteAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(IngredientInRecipe)
@@ -64,3 +76,7 @@ class IngredientInRecipe(admin.ModelAdmin):
         'ingredient',
         'amount',
     )
+    list_select_related = ('ingredient',)
+    search_fields = ('^ingredient__name',)
+    autocomplete_fields = ('ingredient',)
+    show_full_result_count = False
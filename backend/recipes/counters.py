@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Follow
+from .models import Favourite, Recipe, ShoppingList
+
+User = get_user_model()
+
+# (модель со счётчиком, поле счётчика, учитываемая модель, внешний ключ)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favourite, 'recipe'),
+    (Recipe, 'shopping_cart_count', ShoppingList, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def change_counter(model, field, pk, delta):
+    """Атомарно изменяет счётчик на delta (UPDATE ... SET f = f + delta)."""
+    if pk is not None:
+        model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def actual_count(counted_model, foreign_key):
+    return Coalesce(
+        Subquery(
+            counted_model.objects.filter(**{foreign_key: OuterRef('pk')})
+            .order_by()
+            .values(foreign_key)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def reconcile_counters():
+    """
+    Пересчитывает счётчики, разошедшиеся с фактическими данными.
+    Возвращает словарь {'модель.поле': число исправленных строк}.
+    """
+    fixed = {}
+    for model, field, counted_model, foreign_key in COUNTERS:
+        count = actual_count(counted_model, foreign_key)
+        fixed[f'{model._meta.label}.{field}'] = (
+            model.objects.exclude(**{field: count}).update(**{field: count})
+        )
+    return fixed
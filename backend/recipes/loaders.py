@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .models import Ingredient
+
+READ_SIZE = 64 * 1024
+
+
+def iter_csv(path):
+    """Строки CSV-файла вида «название,единица измерения»."""
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if len(row) >= 2:
+                yield {'name': row[0], 'measurement_unit': row[1]}
+            else:
+                yield None
+
+
+def _decode_items(buffer, decoder):
+    """Разбирает полные элементы массива в начале buffer."""
+    items = []
+    while True:
+        buffer = buffer.lstrip(', \t\r\n')
+        if not buffer or buffer[0] == ']':
+            return items, buffer
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            return items, buffer
+        items.append(item if isinstance(item, dict) else None)
+        buffer = buffer[end:]
+
+
+def iter_json(path):
+    """
+    Объекты JSON-массива, прочитанные по частям: файл не загружается
+    в память целиком.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as file:
+        buffer = file.read(READ_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError('Ожидается JSON-массив.')
+        buffer = buffer[1:]
+        while True:
+            chunk = file.read(READ_SIZE)
+            buffer += chunk
+            items, buffer = _decode_items(buffer, decoder)
+            yield from items
+            if not chunk:
+                break
+    if buffer.strip() != ']':
+        raise ValueError('Некорректный JSON-файл.')
+
+
+READERS = {
+    '.csv': iter_csv,
+    '.json': iter_json,
+}
+
+
+def iter_ingredients(path):
+    """Ингредиенты из CSV- или JSON-файла (по расширению)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f'Неподдерживаемый формат файла: {extension}')
+    return READERS[extension](path)
+
+
+def normalize(row):
+    """Ключ (название, единица измерения) или None для пустых строк."""
+    if row is None:
+        return None
+    name = str(row.get('name') or '').strip()
+    measurement_unit = str(row.get('measurement_unit') or '').strip()
+    if not name or not measurement_unit:
+        return None
+    return name, measurement_unit
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_ingredients(rows, batch_size=1000):
+    """
+    Добавляет отсутствующие ингредиенты пакетами. Уникальность
+    обеспечивается ограничением (name, measurement_unit), поэтому
+    повторная загрузка того же файла ничего не дублирует.
+    Возвращает словарь со счётчиками inserted и skipped.
+    """
+    stats = {'inserted': 0, 'skipped': 0}
+    for batch in batched(rows, batch_size):
+        keys = set()
+        for row in batch:
+            key = normalize(row)
+            if key is None or key in keys:
+                stats['skipped'] += 1
+            else:
+                keys.add(key)
+        with transaction.atomic():
+            existing = {
+                key for key in Ingredient.objects.filter(
+                    name__in={name for name, _ in keys},
+                    measurement_unit__in={unit for _, unit in keys},
+                ).values_list('name', 'measurement_unit')
+                if key in keys
+            }
+            new = keys - existing
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in sorted(new)
+                ],
+                ignore_conflicts=True,
+            )
+        stats['inserted'] += len(new)
+        stats['skipped'] += len(existing)
+    return stats
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class IteratorStream:
+    """Файлоподобный объект поверх итератора строк (для COPY FROM STDIN)."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def copy_ingredients(rows, batch_size=1000):
+    """
+    Загрузка через PostgreSQL COPY FROM STDIN во временную таблицу
+    и слияние в recipes_ingredient (INSERT ... ON CONFLICT DO NOTHING).
+    На других СУБД используется пакетная вставка upsert_ingredients.
+    """
+    if connection.vendor != 'postgresql':
+        return upsert_ingredients(rows, batch_size=batch_size)
+    stats = {'inserted': 0, 'skipped': 0}
+    writer = csv.writer(Echo())
+
+    def lines():
+        for row in rows:
+            key = normalize(row)
+            if key is None:
+                stats['skipped'] += 1
+                continue
+            yield writer.writerow(key)
+
+    table = Ingredient._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE ingredient_staging ('
+            'name varchar(200), measurement_unit varchar(200)'
+            ') ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            'COPY ingredient_staging (name, measurement_unit) '
+            'FROM STDIN WITH (FORMAT csv)',
+            IteratorStream(lines()),
+        )
+        cursor.execute('SELECT count(*) FROM ingredient_staging')
+        staged = cursor.fetchone()[0]
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            f'SELECT DISTINCT name, measurement_unit FROM ingredient_staging '
+            f'ON CONFLICT (name, measurement_unit) DO NOTHING'
+        )
+        stats['inserted'] = cursor.rowcount
+    stats['skipped'] += staged - stats['inserted']
+    return stats
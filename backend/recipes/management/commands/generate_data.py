@@ -0,0 +1,230 @@
+import random
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+from recipes.loaders import batched
+from recipes.models import (Favourite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingList, Tag)
+from recipes.versions import RECIPES, bump_version
+from users.models import Follow
+
+User = get_user_model()
+
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500)
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'каша', 'запеканка', 'омлет', 'паста',
+    'плов', 'борщ', 'блины', 'котлеты', 'жаркое', 'соус', 'десерт', 'хлеб',
+)
+ADJECTIVES = (
+    'домашний', 'быстрый', 'летний', 'острый', 'сырный', 'овощной',
+    'мясной', 'рыбный', 'сладкий', 'постный', 'праздничный', 'бабушкин',
+)
+
+
+def skewed_index(rnd, size, skew):
+    """Случайный индекс в [0, size): малые индексы выпадают чаще
+    (популярные авторы, рецепты и ингредиенты)."""
+    return min(int(size * rnd.random() ** skew), size - 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерация тестовых данных (пользователи, рецепты, избранное, "
+        "корзины, подписки) для нагрузочного тестирования."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument(
+            "--favorites", type=int, default=20,
+            help="Среднее число избранных рецептов на пользователя.",
+        )
+        parser.add_argument(
+            "--carts", type=int, default=5,
+            help="Среднее число рецептов в корзине пользователя.",
+        )
+        parser.add_argument(
+            "--follows", type=int, default=10,
+            help="Среднее число подписок пользователя.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.tag_ids = list(Tag.objects.values_list("id", flat=True))
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list("id", flat=True)
+        )
+        if not self.tag_ids or not self.ingredient_ids:
+            raise CommandError(
+                "Сначала загрузите теги и ингредиенты "
+                "(load_tags, load_ingredients)."
+            )
+        user_ids = self.create_users(options["users"])
+        if not user_ids:
+            raise CommandError("Нужен хотя бы один пользователь.")
+        amount_ids = self.create_amounts()
+        recipe_ids = self.create_recipes(
+            options["recipes"], user_ids, amount_ids
+        )
+        self.create_user_relations(
+            Favourite, "recipe_id", user_ids, recipe_ids,
+            options["favorites"],
+        )
+        self.create_user_relations(
+            ShoppingList, "recipe_id", user_ids, recipe_ids,
+            options["carts"],
+        )
+        self.create_user_relations(
+            Follow, "author_id", user_ids, user_ids, options["follows"],
+        )
+        reconcile_counters()
+        bump_version(RECIPES)
+        self.stdout.write(self.style.SUCCESS(
+            "***Тестовые данные успешно созданы!***"))
+
+    def new_ids(self, model, last_id):
+        """id строк, созданных после last_id (bulk_create на SQLite
+        не возвращает первичные ключи)."""
+        return array("q", model.objects.filter(id__gt=last_id).order_by(
+            "id").values_list("id", flat=True).iterator())
+
+    def last_id(self, model):
+        last = model.objects.order_by("-id").values_list("id", flat=True)
+        return last.first() or 0
+
+    def create_users(self, total):
+        last_id = self.last_id(User)
+        start = User.objects.count()
+        password = make_password("password")
+        for batch in batched(range(start, start + total), self.batch_size):
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f"user{number}",
+                        email=f"user{number}@example.com",
+                        first_name=f"Имя{number}",
+                        last_name=f"Фамилия{number}",
+                        password=password,
+                    )
+                    for number in batch
+                ],
+                ignore_conflicts=True,
+            )
+        # ignore_conflicts пропускает занятые имена, поэтому
+        # созданные записи считаются по таблице.
+        self.stdout.write(f"Пользователи: {User.objects.count() - start}")
+        return self.new_ids(User, last_id) or array(
+            "q", User.objects.values_list("id", flat=True)
+        )
+
+    def create_amounts(self):
+        """Пары (ингредиент, количество), общие для всех рецептов."""
+        IngredientInRecipe.objects.bulk_create(
+            [
+                IngredientInRecipe(ingredient_id=ingredient_id, amount=amount)
+                for ingredient_id in self.ingredient_ids
+                for amount in AMOUNTS
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        return {
+            (ingredient_id, amount): pk
+            for ingredient_id, amount, pk in IngredientInRecipe.objects.filter(
+                amount__in=AMOUNTS
+            ).values_list("ingredient_id", "amount", "id")
+        }
+
+    def create_recipes(self, total, user_ids, amount_ids):
+        rnd = self.rnd
+        last_id = self.last_id(Recipe)
+        for batch in batched(range(total), self.batch_size):
+            with transaction.atomic():
+                batch_last_id = self.last_id(Recipe)
+                Recipe.objects.bulk_create([
+                    Recipe(
+                        author_id=user_ids[
+                            skewed_index(rnd, len(user_ids), 2)
+                        ],
+                        name=(
+                            f"{rnd.choice(ADJECTIVES).capitalize()} "
+                            f"{rnd.choice(WORDS)} №{number}"
+                        ),
+                        image="recipes/generated.png",
+                        text=" ".join(rnd.choices(WORDS, k=40)),
+                        cooking_time=rnd.randint(5, 180),
+                    )
+                    for number in batch
+                ])
+                self.link_recipes(
+                    self.new_ids(Recipe, batch_last_id), amount_ids
+                )
+        self.stdout.write(f"Рецепты: {total}")
+        return self.new_ids(Recipe, last_id)
+
+    def link_recipes(self, recipe_ids, amount_ids):
+        """Теги (1-3) и ингредиенты (3-12) для созданных рецептов."""
+        rnd = self.rnd
+        tag_links = []
+        ingredient_links = []
+        for recipe_id in recipe_ids:
+            for tag_id in rnd.sample(self.tag_ids, rnd.randint(
+                1, min(3, len(self.tag_ids))
+            )):
+                tag_links.append(Recipe.tags.through(
+                    recipe_id=recipe_id, tag_id=tag_id
+                ))
+            ingredients = {
+                self.ingredient_ids[
+                    skewed_index(rnd, len(self.ingredient_ids), 3)
+                ]
+                for _ in range(rnd.randint(3, 12))
+            }
+            for ingredient_id in ingredients:
+                ingredient_links.append(Recipe.ingredients.through(
+                    recipe_id=recipe_id,
+                    ingredientinrecipe_id=amount_ids[
+                        (ingredient_id, rnd.choice(AMOUNTS))
+                    ],
+                ))
+        Recipe.tags.through.objects.bulk_create(
+            tag_links, batch_size=self.batch_size
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            ingredient_links, batch_size=self.batch_size
+        )
+
+    def create_user_relations(self, model, field, user_ids, target_ids,
+                              average):
+        """Избранное, корзины или подписки: у каждого пользователя
+        в среднем average записей, популярные объекты выбираются чаще."""
+        rnd = self.rnd
+        if not target_ids or average <= 0:
+            return
+        # Повторы пропускаются ignore_conflicts, поэтому созданные
+        # записи считаются по таблице, а не по переданным объектам.
+        before = model.objects.count()
+        for batch in batched(user_ids, max(1, self.batch_size // average)):
+            objects = []
+            for user_id in batch:
+                targets = {
+                    target_ids[skewed_index(rnd, len(target_ids), 3)]
+                    for _ in range(int(rnd.expovariate(1 / average)))
+                }
+                targets.discard(user_id if field == "author_id" else None)
+                objects.extend(
+                    model(user_id=user_id, **{field: target_id})
+                    for target_id in targets
+                )
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+        created = model.objects.count() - before
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {created}")
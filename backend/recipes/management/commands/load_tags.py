@@ -1,5 +1,6 @@
 from django.core.management import BaseCommand
 from recipes.models import Tag
+from recipes.reference import tags_reference
 
 
 class Command(BaseCommand):
@@ -14,6 +15,9 @@ class Command(BaseCommand):
             {"name": "перекус", "color": "#FFD700", "slug": "snack"},
         ]
         Tag.objects.bulk_create(Tag(**tag) for tag in data)
+        # bulk_create не отправляет сигналы: версию тегов меняем явно,
+        # иначе воркеры продолжат отдавать прежний справочник.
+        tags_reference.invalidate()
         self.stdout.write(
             self.style.SUCCESS("***Теги успешно загружены!***")
         )
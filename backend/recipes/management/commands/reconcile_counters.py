@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Пересчёт счётчиков избранного, корзин, рецептов и подписчиков."
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            fixed = reconcile_counters()
+        for counter, rows in fixed.items():
+            self.stdout.write(f"{counter}: исправлено строк - {rows}")
+        self.stdout.write(
+            self.style.SUCCESS("***Счётчики пересчитаны!***")
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:58
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Объединяет дубликаты ингредиентов перед добавлением ограничения."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Through = Recipe.ingredients.through
+    duplicates = (
+        Ingredient.objects.order_by()
+        .values('name', 'measurement_unit')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicates:
+        keep_id = group['keep_id']
+        others = Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=keep_id)
+        for amount in IngredientInRecipe.objects.filter(ingredient__in=others):
+            target = IngredientInRecipe.objects.filter(
+                ingredient_id=keep_id, amount=amount.amount
+            ).first()
+            if target is None:
+                amount.ingredient_id = keep_id
+                amount.save(update_fields=['ingredient'])
+                continue
+            linked = Through.objects.filter(
+                ingredientinrecipe_id=target.id
+            ).values_list('recipe_id', flat=True)
+            Through.objects.filter(ingredientinrecipe_id=amount.id).exclude(
+                recipe_id__in=list(linked)
+            ).update(ingredientinrecipe_id=target.id)
+            amount.delete()
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
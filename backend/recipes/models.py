@@ -49,6 +49,12 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        constraints = (
+            UniqueConstraint(
+                fields=('name', 'measurement_unit',),
+                name='unique_ingredient',
+            ),
+        )
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
@@ -86,6 +92,54 @@ class IngredientInRecipe(models.Model):
         )
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов."""
+
+    def with_related(self):
+        """Загружает автора, теги и ингредиенты рецептов
+        фиксированным числом запросов."""
+        return self.select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'ingredients',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def recent_by_authors(self, author_ids, limit=None):
+        """
+        Последние рецепты каждого из авторов одним запросом:
+        не больше limit рецептов на автора (ROW_NUMBER() по автору).
+        Возвращает словарь {id автора: [рецепты]}.
+        """
+        recipes = {author_id: [] for author_id in author_ids}
+        if not recipes:
+            return recipes
+        if limit is None:
+            queryset = self.filter(author_id__in=recipes).order_by(
+                '-pub_date', '-id'
+            )
+        else:
+            table = self.model._meta.db_table
+            placeholders = ', '.join(['%s'] * len(recipes))
+            queryset = self.raw(
+                f'SELECT * FROM ('
+                f'SELECT id, name, image, cooking_time, author_id, '
+                f'ROW_NUMBER() OVER ('
+                f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+                f') AS row_number '
+                f'FROM {table} WHERE author_id IN ({placeholders})'
+                f') ranked WHERE row_number <= %s '
+                f'ORDER BY author_id, row_number',
+                [*recipes, limit],
+            )
+        for recipe in queryset:
+            recipes[recipe.author_id].append(recipe)
+        return recipes
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
     author = models.ForeignKey(
@@ -125,11 +179,33 @@ class Recipe(models.Model):
         verbose_name="Дата публикации рецепта",
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения рецепта",
+        auto_now=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлено в избранное',
+        default=0,
+        editable=False,
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name='Добавлено в списки покупок',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -0,0 +1,66 @@
+import json
+import threading
+
+from .models import Ingredient, Tag
+from .versions import bump_version, get_version
+
+
+def render_json(data):
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+class ReferenceData:
+    """
+    Справочная таблица (теги, ингредиенты) в памяти процесса
+    в виде готового JSON для списка и для каждого объекта.
+
+    Версия справочника (recipes.versions) меняется при каждом
+    изменении таблицы (см. recipes.signals). Процесс пересобирает
+    свою копию, когда её версия отличается от текущей. Метки версий
+    лежат в общем кеше versions, поэтому изменения из другого процесса
+    (в том числе load_ingredients и generate_data) видны всем воркерам.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.version_name = model._meta.label_lower
+        self._lock = threading.Lock()
+        self._data = None
+
+    @property
+    def version(self):
+        return get_version(self.version_name)
+
+    def invalidate(self):
+        bump_version(self.version_name)
+
+    def _get_data(self):
+        version = self.version
+        data = self._data
+        if data is None or data[0] != version:
+            with self._lock:
+                rows = list(self.model.objects.values(*self.fields))
+                data = (
+                    version,
+                    render_json(rows),
+                    {row['id']: render_json(row) for row in rows},
+                )
+                self._data = data
+        return data
+
+    def list_json(self):
+        """JSON всего справочника."""
+        return self._get_data()[1]
+
+    def detail_json(self, pk):
+        """JSON одного объекта или None, если его нет."""
+        return self._get_data()[2].get(pk)
+
+
+tags_reference = ReferenceData(Tag, ('id', 'name', 'color', 'slug'))
+ingredients_reference = ReferenceData(
+    Ingredient, ('id', 'name', 'measurement_unit')
+)
@@ -0,0 +1,46 @@
+import threading
+
+from .models import Tag
+from .versions import TAGS, get_version
+
+
+class TagRegistry:
+    """
+    Теги в памяти процесса. Таблица тегов маленькая и почти
+    не меняется, поэтому запись рецептов не обращается к БД за тегами.
+    Реестр перечитывается при смене версии тегов (recipes.versions),
+    поэтому изменения и удаления из другого процесса видны сразу.
+    При промахе реестр тоже перечитывается: так находятся теги,
+    созданные в обход сигналов (например, через bulk_create).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+
+    def invalidate(self):
+        self._data = None
+
+    def _load(self, version):
+        with self._lock:
+            self._data = (
+                version, {tag.id: tag for tag in Tag.objects.all()}
+            )
+        return self._data[1]
+
+    def all(self):
+        version = get_version(TAGS)
+        data = self._data
+        if data is None or data[0] != version:
+            return self._load(version)
+        return data[1]
+
+    def get(self, pk):
+        """Возвращает тег по id или None, если такого тега нет."""
+        tag = self.all().get(pk)
+        if tag is None:
+            tag = self._load(get_version(TAGS)).get(pk)
+        return tag
+
+
+tag_registry = TagRegistry()
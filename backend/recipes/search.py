@@ -0,0 +1,72 @@
+import threading
+from bisect import bisect_left
+
+from .models import Ingredient
+from .versions import INGREDIENTS, get_version
+
+
+class IngredientIndex:
+    """
+    Индекс названий ингредиентов в памяти процесса для автодополнения.
+    Строится при первом обращении и перестраивается при смене версии
+    ингредиентов (см. recipes.versions и recipes.signals).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+
+    def invalidate(self):
+        self._data = None
+
+    def _get_data(self):
+        version = get_version(INGREDIENTS)
+        data = self._data
+        if data is None or data[0] != version:
+            with self._lock:
+                data = self._data
+                if data is None or data[0] != version:
+                    data = self._build(version)
+                    self._data = data
+        return data[1:]
+
+    def _build(self, version):
+        entries = sorted(
+            (name.casefold(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        keys = [entry[0] for entry in entries]
+        return version, keys, entries
+
+    def search(self, query, limit=None):
+        """
+        Возвращает ингредиенты, название которых начинается с query,
+        а затем те, в названии которых query встречается.
+        """
+        keys, entries = self._get_data()
+        query = query.casefold()
+        matched = []
+        position = bisect_left(keys, query)
+        while position < len(keys) and keys[position].startswith(query):
+            matched.append(entries[position])
+            position += 1
+            if limit is not None and len(matched) >= limit:
+                return self._as_dicts(matched)
+        for key, *entry in entries:
+            if limit is not None and len(matched) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                matched.append((key, *entry))
+        return self._as_dicts(matched)
+
+    @staticmethod
+    def _as_dicts(entries):
+        return [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, pk, name, measurement_unit in entries
+        ]
+
+
+ingredient_index = IngredientIndex()
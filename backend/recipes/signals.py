@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import Follow
+from .counters import COUNTERS, change_counter
+from .models import (Favourite, Ingredient, IngredientInRecipe, Recipe,
+                     ShoppingList, Tag)
+from .reference import ingredients_reference, tags_reference
+from .registry import tag_registry
+from .search import ingredient_index
+from .versions import (INGREDIENT_AMOUNTS, RECIPES, bump_version,
+                       user_version_name)
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    """Сбрасывает индекс автодополнения и справочник ингредиентов
+    при изменении ингредиентов."""
+    ingredient_index.invalidate()
+    ingredients_reference.invalidate()
+    bump_version(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_registry(**kwargs):
+    """Сбрасывает реестр и справочник тегов при изменении тегов."""
+    tag_registry.invalidate()
+    tags_reference.invalidate()
+    bump_version(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def bump_recipes_version(**kwargs):
+    """Отмечает изменение рецептов."""
+    bump_version(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def bump_ingredient_amounts_version(**kwargs):
+    """Отмечает изменение количеств ингредиентов."""
+    bump_version(INGREDIENT_AMOUNTS)
+    bump_version(RECIPES)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipes(instance, action, reverse, pk_set, **kwargs):
+    """Изменение тегов и ингредиентов рецепта обновляет
+    его updated_at и версию рецептов."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif pk_set:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    else:
+        recipes = Recipe.objects.none()
+    recipes.update(updated_at=timezone.now())
+    bump_version(RECIPES)
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(instance, created, update_fields=None, **kwargs):
+    """
+    Данные автора входят в рецепт: изменение пользователя обновляет
+    updated_at только его рецептов, кеш остальных не сбрасывается.
+    Вход в систему (обновление last_login) рецепты не трогает;
+    при удалении пользователя его рецепты удаляются каскадно.
+    """
+    if created:
+        return
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    touched = Recipe.objects.filter(author=instance).update(
+        updated_at=timezone.now()
+    )
+    if touched:
+        bump_version(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Favourite)
+@receiver((post_save, post_delete), sender=ShoppingList)
+@receiver((post_save, post_delete), sender=Follow)
+def bump_user_version(instance, **kwargs):
+    """Отмечает изменение избранного, корзины или подписок
+    пользователя."""
+    bump_version(user_version_name(instance.user_id))
+
+
+def counter_receivers(sender, counter_model, field, foreign_key):
+    """Поддерживает счётчик counter_model.field при создании
+    и удалении объектов sender."""
+
+    def increment(instance, created, **kwargs):
+        if created:
+            change_counter(
+                counter_model, field, getattr(instance, foreign_key), 1
+            )
+
+    def decrement(instance, **kwargs):
+        change_counter(
+            counter_model, field, getattr(instance, foreign_key), -1
+        )
+
+    post_save.connect(increment, sender=sender, weak=False)
+    post_delete.connect(decrement, sender=sender, weak=False)
+
+
+for counter_model, field, counted_model, foreign_key in COUNTERS:
+    counter_receivers(counted_model, counter_model, field, f'{foreign_key}_id')
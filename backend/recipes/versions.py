@@ -0,0 +1,57 @@
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+
+USER_PREFIX = 'user:'
+
+
+def _cache(name):
+    # Персональные метки хранятся отдельно от общих: их столько же,
+    # сколько пользователей, и вытеснение не должно задевать общие.
+    if name.startswith(USER_PREFIX):
+        return caches['user_versions']
+    return caches['versions']
+
+
+def _key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    """
+    Метка версии (время последнего изменения) набора данных.
+    Хранится в кеше versions (персональные — в user_versions), общем
+    для всех процессов; если метки нет (например, истекла), она
+    создаётся текущим временем, что равносильно изменению данных.
+    """
+    cache = _cache(name)
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), time.time())
+        version = cache.get(_key(name))
+    return version
+
+
+def bump_version(name):
+    """
+    Отмечает изменение набора данных. Внутри транзакции метка меняется
+    только после фиксации: иначе параллельный запрос успел бы
+    закешировать старые данные под новой версией.
+    """
+    transaction.on_commit(
+        lambda: _cache(name).set(_key(name), time.time())
+    )
+
+
+def user_version_name(user_id):
+    """Имя версии персональных данных пользователя
+    (избранное, корзина, подписки)."""
+    return f'{USER_PREFIX}{user_id}'
+
+
+RECIPES = 'recipes'
+TAGS = 'recipes.tag'
+INGREDIENTS = 'recipes.ingredient'
+INGREDIENT_AMOUNTS = 'recipes.ingredientinrecipe'
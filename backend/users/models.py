@@ -30,6 +30,16 @@ class User(AbstractUser):
         verbose_name="Фамилия пользователя",
         max_length=150,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Количество рецептов",
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Количество подписчиков",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('id',)